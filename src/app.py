@@ -9,20 +9,39 @@ This module provides a production-ready UI with:
 
 import os
 import json
+import logging
 import time
+import uuid
+import asyncio
+import threading
 from pathlib import Path
 import streamlit as st
 from dotenv import load_dotenv
-from graph import graph, initialize_state
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from graph import create_graph, initialize_state
+from nodes import TOKEN_THRESHOLD
 from schemas import SessionSummary, QueryAnalysis
-from utils import load_test_data, count_tokens, messages_to_text
+from utils import load_test_case, count_tokens, messages_to_text
 
 # Load environment variables
 load_dotenv()
 
+# Node logs go to the console; LOG_LEVEL=DEBUG adds the analysis/summary JSON
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+log = logging.getLogger(__name__)
+
 # Get the project root directory (parent of src/)
 PROJECT_ROOT = Path(__file__).parent.parent
 TEST_DATA_PATH = PROJECT_ROOT / "data" / "conversations.jsonl"
+TEST_CASE_COUNT = 3  # One per test-case button in the sidebar
+
+# Summary fields shown in the debug panel, with their display labels
+SUMMARY_SECTIONS = [
+    ("user_profile", "User Profile"),
+    ("key_facts", "Key Facts"),
+    ("decisions", "Decisions"),
+    ("todos", "To-Dos"),
+]
 
 # Page configuration
 st.set_page_config(
@@ -32,6 +51,56 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Start the background event loop that runs every graph coroutine.
+    
+    A single long-lived loop (rather than asyncio.run per call) is required
+    by async checkpointers such as AsyncSqliteSaver, whose connection is
+    bound to the loop it was opened on.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def run_async(coro):
+    """Run a coroutine on the background event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+def create_checkpointer():
+    """
+    Create the checkpointer selected by the CHECKPOINT_DB environment variable.
+    
+    Returns:
+        AsyncSqliteSaver backed by the CHECKPOINT_DB file if it is set,
+        otherwise None (create_graph then falls back to MemorySaver)
+    """
+    db_path = os.getenv("CHECKPOINT_DB")
+    if not db_path:
+        return None
+    
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    
+    async def open_saver():
+        # Opened on the background loop so the saver binds to it
+        return AsyncSqliteSaver(await aiosqlite.connect(db_path))
+    
+    return run_async(open_saver())
+
+
+@st.cache_resource(show_spinner=False)
+def get_graph():
+    """Build the compiled graph once and share it across reruns and sessions."""
+    return create_graph(checkpointer=create_checkpointer())
+
+
+graph = get_graph()
+
 # Initialize session state
 if "thread_id" not in st.session_state:
     st.session_state.thread_id = "default-session"
@@ -42,23 +111,43 @@ if "initialized" not in st.session_state:
 if "display_messages" not in st.session_state:
     st.session_state.display_messages = []
 
+# Only a successful API key check is cached, so a newly added key is still picked up
+if not st.session_state.get("api_key_configured"):
+    st.session_state.api_key_configured = bool(os.getenv("GROQ_API_KEY"))
+
+
+# Display role for each LangChain message class
+_ROLE_MAP = {
+    HumanMessage: "user",
+    AIMessage: "assistant",
+    SystemMessage: "system",
+}
+
+
+def message_to_dict(message) -> dict:
+    """Convert a LangChain message object to display dict format (no caching)."""
+    role = _ROLE_MAP.get(type(message))
+    if role is None:
+        # Fallback for unknown message types
+        return {"role": "unknown", "content": str(message)}
+    return {"role": role, "content": message.content}
+
 
 def convert_message_to_dict(message):
     """Convert a message to dict format, whether it's already a dict or a LangChain message object."""
     if isinstance(message, dict):
         return message
-    else:
-        # LangChain message object (HumanMessage, AIMessage, etc.)
-        from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-        if isinstance(message, HumanMessage):
-            return {"role": "user", "content": message.content}
-        elif isinstance(message, AIMessage):
-            return {"role": "assistant", "content": message.content}
-        elif isinstance(message, SystemMessage):
-            return {"role": "system", "content": message.content}
-        else:
-            # Fallback for unknown message types
-            return {"role": "unknown", "content": str(message)}
+    
+    # add_messages assigns every message a stable id, so conversions can be reused across reruns
+    cache = st.session_state.setdefault("_conv_cache", {})
+    message_id = getattr(message, "id", None)
+    if message_id is not None and message_id in cache:
+        return cache[message_id]
+    
+    converted = message_to_dict(message)
+    if message_id is not None:
+        cache[message_id] = converted
+    return converted
 
 
 def get_current_state():
@@ -70,6 +159,9 @@ def get_current_state():
         state_snapshot = graph.get_state(config)
         
         if state_snapshot and state_snapshot.values:
+            # Thread already has a checkpoint - no need to seed it again
+            if state_snapshot.values.get("messages"):
+                st.session_state.initialized = True
             return state_snapshot.values
         else:
             return initialize_state()
@@ -78,76 +170,275 @@ def get_current_state():
         return initialize_state()
 
 
-def invoke_graph(user_message: str):
-    """Invoke the graph with a user message."""
-    try:
-        config = {"configurable": {"thread_id": st.session_state.thread_id}}
-        
-        # Check if we have existing state in checkpointer
-        state_snapshot = graph.get_state(config)
-        
-        if state_snapshot and state_snapshot.values and state_snapshot.values.get("messages"):
-            # State exists - only pass new message, add_messages will merge
-            input_state = {
-                "messages": [{"role": "user", "content": user_message}]
-            }
-        else:
-            # First message - provide full initial state
-            from graph import initialize_state
-            input_state = initialize_state()
-            input_state["messages"] = [{"role": "user", "content": user_message}]
-        
-        # Invoke the graph
-        result = graph.invoke(input_state, config)
-        
-        return result
-    except ValueError as e:
+def sync_display_messages():
+    """
+    Load the chat history from the checkpointer when the display list is empty.
+    
+    Runs before the sidebar renders, so sidebar_view is keyed on the thread's
+    real message count when an existing thread is opened or a failed turn
+    cleared the display list.
+    """
+    if not st.session_state.display_messages:
+        current_state = get_current_state()
+        st.session_state.display_messages = [
+            convert_message_to_dict(m) for m in current_state.get("messages", [])
+        ]
+
+
+@st.cache_data(show_spinner=False, max_entries=256, ttl=3600)
+def sidebar_view(thread_id: str, version: int) -> dict:
+    """
+    Project the checkpointed state down to what the debug panel shows.
+    
+    `version` is the number of messages in the thread (display_messages is
+    synced from the checkpointer before this is called), so the cache is
+    invalidated whenever the conversation changes and reruns in between skip
+    the checkpointer (and deserializing the full message history) entirely.
+    The summary is dumped to a plain dict here, so model_dump() runs once
+    per conversation version rather than on every rerun. Only the latest
+    version of a thread is ever read again, so the process-wide cache is
+    bounded (a few entries per active session) and idle entries expire.
+    """
+    state_snapshot = graph.get_state({"configurable": {"thread_id": thread_id}})
+    values = state_snapshot.values if state_snapshot else {}
+    summary = values.get("summary")
+    return {
+        "token_count": values.get("current_token_count", 0),
+        "summary": summary.model_dump() if hasattr(summary, 'model_dump') else summary
+    }
+
+
+def handle_graph_error(e: Exception):
+    """Surface a graph invocation error in the UI."""
+    if isinstance(e, ValueError):
         # Configuration errors (missing API key, etc.)
         if "GROQ_API_KEY" in str(e):
             st.error("🔑 **API Key Error**: Please configure your GROQ_API_KEY in the .env file")
         else:
             st.error(f"⚙️ **Configuration Error**: {e}")
-        return None
-    except Exception as e:
-        error_str = str(e).lower()
+        return
+    
+    error_str = str(e).lower()
+    
+    # Rate limit errors
+    if "rate_limit" in error_str or "429" in error_str:
+        st.warning("⏳ **Rate Limit Reached**: Please wait a moment before sending another message. Consider upgrading your Groq plan for higher limits.")
+    # Authentication errors
+    elif "401" in error_str or "403" in error_str or "unauthorized" in error_str:
+        st.error("🔐 **Authentication Error**: Your API key appears to be invalid. Please check your GROQ_API_KEY in the .env file.")
+    # Network errors
+    elif "connection" in error_str or "network" in error_str or "timeout" in error_str:
+        st.error("🌐 **Connection Error**: Unable to reach the Groq API. Please check your internet connection.")
+    # Generic errors
+    else:
+        st.error(f"⚠️ **Error**: {e}")
+        st.info("If this persists, please check the console logs for more details.")
+
+
+def build_input_state(user_message: str, seed: bool) -> dict:
+    """
+    Build the graph input for a user message.
+    
+    Args:
+        user_message: The user's message
+        seed: True for the first turn on a thread, which needs the full
+            initial state; later turns only pass the new message
+    """
+    if not seed:
+        # State exists - only pass new message, add_messages will merge
+        return {"messages": [{"role": "user", "content": user_message}]}
+    
+    # First message - provide full initial state
+    input_state = initialize_state()
+    input_state["messages"] = [{"role": "user", "content": user_message}]
+    return input_state
+
+
+async def ainvoke_user_turns(thread_id: str, user_turns: list[str], seed: bool):
+    """
+    Run a sequence of user turns against a thread.
+    
+    Every turn still gets its own assistant reply, but all turns share one
+    event loop. This runs on the background loop, so it must not touch
+    st.session_state; callers update the thread-initialized flag.
+    
+    Args:
+        thread_id: Checkpointer thread to run against
+        user_turns: User message contents, in conversation order
+        seed: Whether the thread still needs its initial state
+        
+    Returns:
+        Final graph state after the last turn, or None if there were no turns
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    
+    result = None
+    for content in user_turns:
+        result = await graph.ainvoke(build_input_state(content, seed), config)
+        seed = False
+    
+    return result
+
+
+async def astream_reply(thread_id: str, user_message: str, seed: bool, final_state: dict):
+    """
+    Stream the assistant's reply to a user message as it is generated.
+    
+    Tokens produced by the answer node's LLM call are yielded as they
+    arrive. Turns that don't stream (clarification, error replies) yield
+    the final assistant message once the graph finishes.
+    
+    Args:
+        thread_id: Checkpointer thread to run against
+        user_message: The user's message
+        seed: Whether the thread still needs its initial state
+        final_state: Dict that receives the final graph state under "values"
         
-        # Rate limit errors
-        if "rate_limit" in error_str or "429" in error_str:
-            st.warning("⏳ **Rate Limit Reached**: Please wait a moment before sending another message. Consider upgrading your Groq plan for higher limits.")
-        # Authentication errors
-        elif "401" in error_str or "403" in error_str or "unauthorized" in error_str:
-            st.error("🔐 **Authentication Error**: Your API key appears to be invalid. Please check your GROQ_API_KEY in the .env file.")
-        # Network errors
-        elif "connection" in error_str or "network" in error_str or "timeout" in error_str:
-            st.error("🌐 **Connection Error**: Unable to reach the Groq API. Please check your internet connection.")
-        # Generic errors
+    Yields:
+        Reply text chunks
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    
+    streamed = False
+    async for mode, payload in graph.astream(
+        build_input_state(user_message, seed),
+        config,
+        stream_mode=["messages", "values"]
+    ):
+        if mode == "messages":
+            chunk, metadata = payload
+            # Only the answer node's tokens belong in the reply
+            if metadata.get("langgraph_node") == "answer" and chunk.content:
+                streamed = True
+                yield chunk.content
         else:
-            st.error(f"⚠️ **Error**: {e}")
-            st.info("If this persists, please check the console logs for more details.")
-        return None
+            final_state["values"] = payload
+    
+    if not streamed and final_state.get("values"):
+        yield message_to_dict(final_state["values"]["messages"][-1])["content"]
+
+
+_STREAM_DONE = object()
+
+
+async def _anext(agen):
+    """Await the next item of an async generator, returning _STREAM_DONE at the end."""
+    try:
+        return await agen.__anext__()
+    except StopAsyncIteration:
+        return _STREAM_DONE
+
+
+def iter_async(agen):
+    """Drive an async generator on the background loop from synchronous code (e.g. st.write_stream)."""
+    try:
+        while (item := run_async(_anext(agen))) is not _STREAM_DONE:
+            yield item
+    finally:
+        run_async(agen.aclose())
+
+
+@st.cache_data(show_spinner=False)
+def cached_test_case(path: str, mtime: float, case_index: int) -> dict | None:
+    """
+    Parse a single test case once and reuse it across button presses.
+    
+    The file's modification time is part of the cache key, so edits to the
+    JSONL are picked up without restarting the app.
+    """
+    return load_test_case(path, case_index)
+
+
+def test_case_user_turns(test_case: dict) -> list[str]:
+    """Extract the user message contents from a test case, in order."""
+    return [
+        msg["content"] for msg in test_case.get("messages", [])
+        if msg["role"] == "user"
+    ]
+
+
+def prewarm_test_cases(test_cases: dict[int, dict], store: dict):
+    """
+    Replay test cases concurrently on the background event loop.
+    
+    Each case is replayed into its own thread ID, and finished replays are
+    written to `store` (keyed by case index) so load_test_conversation can
+    swap them in instead of replaying on click. The replay never calls the
+    Streamlit API; it only fills the plain dict it was handed.
+    
+    Args:
+        test_cases: Test cases to replay, keyed by case index
+        store: Dict that receives {"thread_id", "display_messages"} per case
+    """
+    prefix = uuid.uuid4().hex[:8]
+    thread_ids = {i: f"prewarm-{prefix}-{i}" for i in test_cases}
+    
+    async def replay_all():
+        indexes = list(test_cases)
+        results = await asyncio.gather(
+            *[
+                ainvoke_user_turns(thread_ids[i], test_case_user_turns(test_cases[i]), seed=True)
+                for i in indexes
+            ],
+            return_exceptions=True
+        )
+        for i, result in zip(indexes, results):
+            if isinstance(result, Exception):
+                log.warning("Pre-warming test case %s failed: %s", i, result)
+            elif result:
+                store[i] = {
+                    "thread_id": thread_ids[i],
+                    "display_messages": [message_to_dict(m) for m in result["messages"]]
+                }
+    
+    def log_failure(future):
+        # Errors outside gather (e.g. while filling store) would otherwise vanish
+        if not future.cancelled() and future.exception() is not None:
+            log.error("Pre-warming test cases failed: %s", future.exception())
+    
+    # Fire and forget: the script thread doesn't wait for the replays
+    future = asyncio.run_coroutine_threadsafe(replay_all(), get_event_loop())
+    future.add_done_callback(log_failure)
 
 
 def load_test_conversation(case_index: int):
     """Load a test conversation from the JSONL file."""
+    # Swap in a pre-warmed replay if one is ready (each is used only once)
+    prewarmed = st.session_state.get("prewarmed", {}).pop(case_index, None)
+    if prewarmed:
+        st.session_state.thread_id = prewarmed["thread_id"]
+        st.session_state.initialized = True
+        st.session_state.display_messages = prewarmed["display_messages"]
+        st.rerun()
+    
     try:
-        test_cases = load_test_data(str(TEST_DATA_PATH))
+        mtime = os.path.getmtime(TEST_DATA_PATH)
+        test_case = cached_test_case(str(TEST_DATA_PATH), mtime, case_index)
         
-        if 0 <= case_index < len(test_cases):
-            test_case = test_cases[case_index]
-            
-            # Reset session
-            st.session_state.thread_id = f"test-session-{case_index}"
+        if test_case is not None:
+            # Reset session; a fresh thread each load, so seeding never lands
+            # on an existing checkpoint and duplicates the replayed turns
+            st.session_state.thread_id = f"test-session-{case_index}-{uuid.uuid4().hex[:8]}"
+            st.session_state.initialized = False
             st.session_state.display_messages = []
             
-            # Load messages from test case
-            for msg in test_case.get("messages", []):
-                if msg["role"] == "user":
-                    result = invoke_graph(msg["content"])
-                    if result:
-                        # Update display messages (convert to dict format)
-                        st.session_state.display_messages = [
-                            convert_message_to_dict(m) for m in result["messages"]
-                        ]
+            # Replay all user turns in a single event loop
+            try:
+                result = run_async(ainvoke_user_turns(
+                    st.session_state.thread_id,
+                    test_case_user_turns(test_case),
+                    seed=True
+                ))
+            except Exception as e:
+                handle_graph_error(e)
+                result = None
+            
+            if result:
+                st.session_state.initialized = True
+                # Update display messages (convert to dict format)
+                st.session_state.display_messages = [
+                    convert_message_to_dict(m) for m in result["messages"]
+                ]
             
             st.success(f"Loaded test case: {test_case.get('name', 'Unknown')}")
             st.rerun()
@@ -159,40 +450,33 @@ def load_test_conversation(case_index: int):
         st.error(f"Error loading test data: {e}")
 
 
-# Main UI
-st.title("🤖 Chat Assistant with Session Memory")
-st.caption("Built with LangGraph, Groq, and Streamlit")
-
-# Sidebar for debugging and controls
-with st.sidebar:
-    st.header("🔧 Debug Panel")
-    
-    # API Key status with proactive validation
-    api_key = os.getenv("GROQ_API_KEY")
-    if api_key:
-        st.success("✅ GROQ_API_KEY configured")
-    else:
-        st.error("❌ GROQ_API_KEY not found")
-        st.info("Please create a .env file with your GROQ_API_KEY")
-        st.warning("⚠️ Chat is disabled until API key is configured")
-        # Prevent app operation without API key
-        st.stop()
-    
-    st.divider()
+@st.fragment
+def debug_panel():
+    """
+    Render the sidebar debug panel.
     
+    Running as a fragment means chat submissions don't re-render it mid-turn;
+    the full-app rerun after each turn refreshes it.
+    """
     # Session info
     st.subheader("Session Info")
     st.text(f"Thread ID: {st.session_state.thread_id}")
     
-    # Current state
-    current_state = get_current_state()
+    # Current state (lightweight projection, cached per conversation version)
+    try:
+        view = sidebar_view(
+            st.session_state.thread_id,
+            len(st.session_state.display_messages)
+        )
+    except Exception as e:
+        st.error(f"Error retrieving state: {e}")
+        view = {"token_count": 0, "summary": None}
     
     # Token count
-    token_count = current_state.get("current_token_count", 0)
+    token_count = view["token_count"]
     st.metric("Current Token Count", token_count)
     
     # Progress bar for token threshold
-    from nodes import TOKEN_THRESHOLD
     progress = min(token_count / TOKEN_THRESHOLD, 1.0)
     st.progress(progress, text=f"Threshold: {TOKEN_THRESHOLD}")
     
@@ -200,37 +484,47 @@ with st.sidebar:
     
     # Session Summary
     st.subheader("📋 Session Summary")
-    summary = current_state.get("summary")
-    if summary:
+    summary = view["summary"]
+    # A fresh session has nothing summarized yet, so skip the summary widgets entirely
+    if summary and st.session_state.display_messages:
         with st.expander("View Summary JSON", expanded=False):
-            st.json(summary.model_dump() if hasattr(summary, 'model_dump') else summary)
-        
+            st.json(summary)
+    
         # Display summary fields if they have content
-        if hasattr(summary, 'user_profile') and summary.user_profile:
-            st.write("**User Profile:**")
-            for key, value in summary.user_profile.items():
-                st.write(f"- {key}: {value}")
-        
-        if hasattr(summary, 'key_facts') and summary.key_facts:
-            st.write("**Key Facts:**")
-            for fact in summary.key_facts:
-                st.write(f"- {fact}")
-        
-        if hasattr(summary, 'decisions') and summary.decisions:
-            st.write("**Decisions:**")
-            for decision in summary.decisions:
-                st.write(f"- {decision}")
-        
-        if hasattr(summary, 'todos') and summary.todos:
-            st.write("**To-Dos:**")
-            for todo in summary.todos:
-                st.write(f"- {todo}")
+        with st.expander("View Summary Fields", expanded=False):
+            for field, label in SUMMARY_SECTIONS:
+                value = summary.get(field)
+                if not value:
+                    continue
+                st.write(f"**{label}:**")
+                if isinstance(value, dict):
+                    for key, item in value.items():
+                        st.write(f"- {key}: {item}")
+                else:
+                    for item in value:
+                        st.write(f"- {item}")
     
     st.divider()
     
     # Test data controls
     st.subheader("🧪 Test Data")
     
+    # Opt-in: replay all test cases concurrently in the background
+    if st.toggle("Pre-warm test cases", key="prewarm_enabled") and "prewarmed" not in st.session_state:
+        try:
+            mtime = os.path.getmtime(TEST_DATA_PATH)
+            test_cases = {
+                i: cached_test_case(str(TEST_DATA_PATH), mtime, i)
+                for i in range(TEST_CASE_COUNT)
+            }
+            st.session_state.prewarmed = {}
+            prewarm_test_cases(
+                {i: tc for i, tc in test_cases.items() if tc is not None},
+                st.session_state.prewarmed
+            )
+        except FileNotFoundError:
+            st.error("Test data file not found. Please ensure data/conversations.jsonl exists.")
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
@@ -249,59 +543,108 @@ with st.sidebar:
     
     # Reset button
     if st.button("🔄 Reset Session", type="secondary", use_container_width=True):
-        st.session_state.thread_id = f"session-{hash(str(st.session_state.get('reset_count', 0)))}"
         st.session_state.reset_count = st.session_state.get('reset_count', 0) + 1
+        # uuid suffix: the graph and its checkpointer are shared by every browser session
+        st.session_state.thread_id = f"session-{st.session_state.reset_count}-{uuid.uuid4().hex[:8]}"
+        st.session_state.initialized = False
         st.session_state.display_messages = []
+        st.session_state._conv_cache = {}
         st.rerun()
 
-# Main chat interface
-st.divider()
 
-# Display chat messages
-if not st.session_state.display_messages:
-    # Initialize with current state messages
-    current_state = get_current_state()
-    st.session_state.display_messages = [
-        convert_message_to_dict(m) for m in current_state.get("messages", [])
-    ]
-
-for message in st.session_state.display_messages:
-    message_dict = convert_message_to_dict(message)
-    role = message_dict["role"]
-    content = message_dict["content"]
+@st.fragment
+def chat_area():
+    """
+    Render the chat history and input box.
     
-    # Custom avatars: white for user, blue for assistant
-    if role == "user":
-        avatar = "👤"  # User silhouette
-    else:
-        avatar = "🤖"  # Robot/AI icon (will appear blue with theme)
+    Running as a fragment means a submitted prompt reruns only the chat area
+    while the reply streams in; the sidebar is refreshed afterwards.
+    """
+    # Display chat messages
+    for message in st.session_state.display_messages:
+        # display_messages is always stored in dict form
+        role = message["role"]
+        content = message["content"]
+        
+        # Custom avatars: white for user, blue for assistant
+        if role == "user":
+            avatar = "👤"  # User silhouette
+        else:
+            avatar = "🤖"  # Robot/AI icon (will appear blue with theme)
+        
+        with st.chat_message(role, avatar=avatar):
+            st.write(content)
     
-    with st.chat_message(role, avatar=avatar):
-        st.write(content)
+    # Chat input
+    if prompt := st.chat_input("Type your message here..."):
+        # Display user message immediately with avatar
+        with st.chat_message("user", avatar="👤"):
+            st.write(prompt)
+        
+        # Add to display messages
+        history_len = len(st.session_state.display_messages)
+        st.session_state.display_messages.append({
+            "role": "user",
+            "content": prompt
+        })
+        
+        # Stream the reply while the graph runs
+        final_state = {}
+        with st.chat_message("assistant", avatar="🤖"):
+            try:
+                st.write_stream(iter_async(astream_reply(
+                    st.session_state.thread_id,
+                    prompt,
+                    not st.session_state.initialized,
+                    final_state
+                )))
+            except Exception as e:
+                handle_graph_error(e)
+                final_state.clear()
+        
+        result = final_state.get("values")
+        if result:
+            st.session_state.initialized = True
+            # add_messages only appends, so only the new tail (user + reply) needs converting
+            st.session_state.display_messages[history_len:] = [
+                convert_message_to_dict(m) for m in result["messages"][history_len:]
+            ]
+        else:
+            # Resync from the checkpointer on the next run instead of guessing what was saved
+            st.session_state.display_messages = []
+        
+        st.rerun()
 
-# Chat input
-if prompt := st.chat_input("Type your message here..."):
-    # Display user message immediately with avatar
-    with st.chat_message("user", avatar="👤"):
-        st.write(prompt)
-    
-    # Add to display messages
-    st.session_state.display_messages.append({
-        "role": "user",
-        "content": prompt
-    })
+
+# Main UI
+st.title("🤖 Chat Assistant with Session Memory")
+st.caption("Built with LangGraph, Groq, and Streamlit")
+
+# Load the thread's history first so the sidebar sees the real message count
+sync_display_messages()
+
+# Sidebar for debugging and controls
+with st.sidebar:
+    st.header("🔧 Debug Panel")
     
-    # Invoke graph
-    with st.spinner("Thinking..."):
-        result = invoke_graph(prompt)
+    # API Key status with proactive validation
+    if st.session_state.api_key_configured:
+        st.success("✅ GROQ_API_KEY configured")
+    else:
+        st.error("❌ GROQ_API_KEY not found")
+        st.info("Please create a .env file with your GROQ_API_KEY")
+        st.warning("⚠️ Chat is disabled until API key is configured")
+        # Prevent app operation without API key
+        st.stop()
     
-    if result:
-        # Update display messages with the latest state (convert to dict format)
-        st.session_state.display_messages = [
-            convert_message_to_dict(m) for m in result["messages"]
-        ]
+    st.divider()
     
-    st.rerun()
+    debug_panel()
+
+# Main chat interface
+st.divider()
+
+chat_area()
 
 # Footer
 st.divider()
@@ -0,0 +1,84 @@
+"""
+Response Cache for LLM Calls
+
+This module provides a process-wide cache in front of the Groq calls:
+- Keys: hash of the exact (system prompt, user prompt) pair
+- LRU eviction once the cache holds max_entries prompts
+"""
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any
+
+
+class ResponseCache:
+    """
+    LRU cache for LLM responses.
+    
+    Entries are keyed on a hash of the exact prompt pair, so only identical
+    prompts reuse a response. Values are
+    deep-copied on the way in and out because nodes mutate the structured
+    responses they receive.
+    """
+    
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(namespace: str, system_prompt: str, user_prompt: str) -> str:
+        """Hash a prompt pair into a cache key."""
+        digest = hashlib.sha256(
+            "\x00".join([system_prompt, user_prompt]).encode("utf-8")
+        ).hexdigest()
+        return f"{namespace}:{digest}"
+    
+    def get(self, namespace: str, system_prompt: str, user_prompt: str) -> Any | None:
+        """
+        Look up a cached response.
+        
+        Args:
+            namespace: Caller identifier (e.g. the node name)
+            system_prompt: System prompt sent to the LLM
+            user_prompt: User prompt sent to the LLM
+        
+        Returns:
+            A copy of the cached response, or None on a miss
+        """
+        key = self._key(namespace, system_prompt, user_prompt)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            value = self._entries[key]
+        return copy.deepcopy(value)
+    
+    def put(self, namespace: str, system_prompt: str, user_prompt: str, response: Any) -> None:
+        """
+        Store a response.
+        
+        Args:
+            namespace: Caller identifier (e.g. the node name)
+            system_prompt: System prompt sent to the LLM
+            user_prompt: User prompt sent to the LLM
+            response: LLM response to cache
+        """
+        value = copy.deepcopy(response)
+        key = self._key(namespace, system_prompt, user_prompt)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache instance used by the graph nodes
+RESPONSE_CACHE = ResponseCache()
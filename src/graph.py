@@ -2,21 +2,23 @@
 LangGraph Workflow Definition
 
 This module defines the StateGraph flow with conditional routing:
-- Analyzes queries for ambiguity
+- Sends obviously clear queries straight to answer generation
+- Analyzes remaining queries for ambiguity
 - Routes to clarification or answer generation
 - Triggers auto-summarization when token threshold is exceeded
 """
 
 from typing import Literal
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
 from schemas import GraphState, SessionSummary, QueryAnalysis
 from nodes import (
-    analyze_query_node,
+    precheck_node,
+    analyze_and_maybe_summarize,
     summarize_node,
     answer_node,
-    clarify_node,
-    TOKEN_THRESHOLD
+    clarify_node
 )
 
 # Configuration: Maximum clarification attempts before forcing best-effort answer
@@ -51,50 +53,43 @@ def should_clarify(state: GraphState) -> Literal["clarify", "answer"]:
     return "answer"
 
 
-def should_summarize(state: GraphState) -> Literal["summarize", "end"]:
-    """
-    Conditional edge function to determine if summarization is needed.
-    
-    Args:
-        state: Current graph state
-        
-    Returns:
-        "summarize" if token count exceeds threshold, "end" otherwise
-    """
-    current_count = state.get("current_token_count", 0)
-    if current_count > TOKEN_THRESHOLD:
-        return "summarize"
-    return "end"
-
-
-def create_graph() -> StateGraph:
+def create_graph(checkpointer: BaseCheckpointSaver | None = None) -> StateGraph:
     """
     Create and compile the LangGraph workflow.
     
     Graph Flow:
-    1. START -> analyze_query_node
-    2. Conditional: is_ambiguous?
+    1. START -> precheck_node
+       - Clearly unambiguous query -> answer_node (skip to step 4)
+       - Otherwise -> analyze_query_node
+    2. analyze_query_node runs the LLM query analysis (if the previous
+       summarization failed, summarize_node is retried concurrently with it)
+    3. Conditional: is_ambiguous?
        - Yes -> clarify_node -> END
        - No -> answer_node
-    3. After answer_node, check token threshold:
+    4. answer_node checks the token threshold and routes itself via Command:
        - Exceeded -> summarize_node -> END
        - Not exceeded -> END
     
+    Args:
+        checkpointer: Checkpointer used for session persistence
+            (defaults to an in-process MemorySaver)
+    
     Returns:
-        Compiled StateGraph with MemorySaver checkpointer
+        Compiled StateGraph with the given checkpointer
     """
     # Initialize the graph with our state schema
     workflow = StateGraph(GraphState)
     
     # Add nodes
-    workflow.add_node("analyze_query", analyze_query_node)
+    workflow.add_node("precheck", precheck_node)
+    workflow.add_node("analyze_query", analyze_and_maybe_summarize)
     workflow.add_node("clarify", clarify_node)
     workflow.add_node("answer", answer_node)
     workflow.add_node("summarize", summarize_node)
     
     # Define edges
-    # Start with query analysis
-    workflow.set_entry_point("analyze_query")
+    # Start with the heuristic precheck; it routes itself via Command
+    workflow.set_entry_point("precheck")
     
     # Conditional edge after analysis
     workflow.add_conditional_edges(
@@ -109,21 +104,14 @@ def create_graph() -> StateGraph:
     # After clarification, end the conversation
     workflow.add_edge("clarify", END)
     
-    # After answer, check if summarization is needed
-    workflow.add_conditional_edges(
-        "answer",
-        should_summarize,
-        {
-            "summarize": "summarize",
-            "end": END
-        }
-    )
+    # answer_node returns a Command routing to summarize or END itself
     
     # After summarization, end
     workflow.add_edge("summarize", END)
     
-    # Compile with memory checkpointer for persistence
-    checkpointer = MemorySaver()
+    # Compile with checkpointer for persistence (in-memory unless one is given)
+    if checkpointer is None:
+        checkpointer = MemorySaver()
     compiled_graph = workflow.compile(checkpointer=checkpointer)
     
     return compiled_graph
@@ -141,9 +129,8 @@ def initialize_state() -> GraphState:
         summary=SessionSummary(),
         analysis=QueryAnalysis(original_query="", is_ambiguous=False),
         current_token_count=0,
-        clarification_count=0  # Initialize clarification counter
+        clarification_count=0,  # Initialize clarification counter
+        summary_pending=False,
+        context_cache=None
     )
 
-
-# Create the graph instance (singleton)
-graph = create_graph()
@@ -2,86 +2,58 @@
 LangGraph Node Functions
 
 This module contains the core logic nodes for the chat assistant workflow:
+- precheck_node: Heuristic fast path that skips analysis for clear queries
 - analyze_query_node: Query understanding and ambiguity detection
+- analyze_and_maybe_summarize: Analysis with concurrent catch-up summarization
 - summarize_node: Auto-summarization when token threshold is exceeded
 - answer_node: Response generation using context
 - clarify_node: Clarification request handler
 """
 
 import os
-from typing import Any
+import re
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, Literal
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END
+from langgraph.types import Command
+from tenacity import retry, stop_after_attempt, wait_exponential
 from schemas import GraphState, SessionSummary, QueryAnalysis
-from utils import count_tokens, format_summary_for_prompt, messages_to_text
+from cache import RESPONSE_CACHE
+from utils import (
+    count_tokens,
+    count_messages_tokens,
+    fast_json,
+    format_message,
+    format_summary_for_prompt,
+    summary_to_compact_text,
+    MESSAGE_OVERHEAD_TOKENS
+)
 
 
+log = logging.getLogger(__name__)
+
 # Configuration
 GROQ_MODEL = "llama-3.1-8b-instant" 
 TOKEN_THRESHOLD = 800
 
+# Recent-message windows: analysis context and answer prompt history
+RECENT_CONTEXT_SIZE = 5
+HISTORY_WINDOW_SIZE = 10
 
-def get_groq_client() -> ChatGroq:
-    """Initialize and return a Groq chat client."""
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise ValueError("GROQ_API_KEY environment variable not set")
-    return ChatGroq(model=GROQ_MODEL, temperature=0.7)
+# SessionSummary fields that can be injected into the answer prompt
+MEMORY_FIELDS = ["user_profile", "key_facts", "decisions", "open_questions", "todos"]
 
-
-def get_message_content(message) -> str:
-    """
-    Extract content from a message, whether it's a dict or LangChain object.
-    
-    Args:
-        message: Dict with 'content' key or LangChain message object
-        
-    Returns:
-        Message content as string
-    """
-    if isinstance(message, dict):
-        return message.get("content", "")
-    else:
-        # LangChain message object
-        return getattr(message, "content", "")
+# Pronouns and deictics that usually point back into the conversation
+_AMBIG_MARKERS = re.compile(r"\b(it|that|this|those|them|they|him|her|there)\b", re.IGNORECASE)
 
 
-def analyze_query_node(state: GraphState) -> GraphState:
-    """
-    Analyze user query for ambiguity and determine needed context.
-    
-    This node uses Groq's structured output to detect if the user's intent
-    is unclear and identify what information from session memory is needed.
-    
-    Args:
-        state: Current graph state
-        
-    Returns:
-        Updated state with QueryAnalysis results
-    """
-    messages = state["messages"]
-    summary = state["summary"]
-    
-    if not messages:
-        # No messages to analyze
-        state["analysis"] = QueryAnalysis(
-            is_ambiguous=False,
-            needed_context_from_memory=[]
-        )
-        return state
-    
-    # Get the latest user message
-    latest_message = get_message_content(messages[-1]) if messages else ""
-    
-    # Get recent conversation context (last 5 messages)
-    recent_context = messages[-5:] if len(messages) > 5 else messages
-    context_text = "\n".join([
-        f"{'user' if isinstance(msg, dict) and msg.get('role') == 'user' else getattr(msg, 'type', 'unknown')}: {get_message_content(msg)}"
-        for msg in recent_context
-    ])
-    
-    # Query analysis system prompt - optimized for structured output
-    system_prompt = """You are an expert Query Understanding Agent. Your task is to process a user's message and output a structured analysis for a downstream chat assistant.
+# System prompts are static, so each is wrapped in a SystemMessage once at import
+ANALYZE_SYSTEM_PROMPT = SystemMessage(content="""You are an expert Query Understanding Agent. Your task is to process a user's message and output a structured analysis for a downstream chat assistant.
 
 CONTEXTUAL DATA:
 - Session Memory (Summary): Available fields are user_profile, key_facts, decisions, open_questions, todos
@@ -113,108 +85,9 @@ SCHEMA:
 CRITICAL RULES:
 - If is_ambiguous is false, clarifying_questions MUST be null or empty
 - needed_context_from_memory can ONLY contain: user_profile, key_facts, decisions, open_questions, todos
-- Return ONLY the JSON object, nothing else"""
-
-    user_prompt = f"""Recent conversation:
-{context_text}
-
-Latest query: {latest_message}
-
-Analyze this query for ambiguity and determine what context is needed."""
+- Return ONLY the JSON object, nothing else""")
 
-    try:
-        llm = get_groq_client()
-        structured_llm = llm.with_structured_output(QueryAnalysis)
-        
-        # Retry logic for structured output - increased to 3 for maximum reliability
-        max_retries = 3
-        last_error = None
-        
-        for attempt in range(max_retries):
-            try:
-                response = structured_llm.invoke([
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=user_prompt)
-                ])
-                
-                # Populate original_query from user input
-                response.original_query = latest_message
-                
-                # Step 1-2: Build augmented context if needed
-                if response.needed_context_from_memory:
-                    memory_context = format_summary_for_prompt(
-                        summary, 
-                        response.needed_context_from_memory
-                    )
-                    response.final_augmented_context = (
-                        f"{memory_context}\n\n"
-                        f"Recent conversation:\n{context_text}"
-                    )
-                
-                # JSON Logging for observability
-                print("\n" + "="*50)
-                print("QUERY ANALYSIS (Step 1-3)")
-                print("="*50)
-                print(response.model_dump_json(indent=2))
-                print("="*50 + "\n")
-                
-                state["analysis"] = response
-                return state
-                
-            except Exception as e:
-                last_error = e
-                if attempt < max_retries - 1:
-                    # Wait before retry (exponential backoff)
-                    import time
-                    time.sleep(0.5 * (attempt + 1))
-                    continue
-                else:
-                    # Final attempt failed, raise error
-                    raise last_error
-                    
-    except Exception as e:
-        print(f"Error in analyze_query_node: {e}")
-        # Fallback: assume query is clear
-        state["analysis"] = QueryAnalysis(
-            original_query=latest_message,
-            is_ambiguous=False,
-            needed_context_from_memory=[]
-        )
-    
-    return state
-
-
-def summarize_node(state: GraphState) -> GraphState:
-    """
-    Summarize conversation when token threshold is exceeded.
-    
-    This node merges new conversation information into the existing
-    SessionSummary and resets the message list to keep only recent context.
-    
-    Args:
-        state: Current graph state
-        
-    Returns:
-        Updated state with new summary and pruned messages
-    """
-    messages = state["messages"]
-    current_summary = state["summary"]
-    
-    # Determine which messages need summarization
-    last_summarized_index = current_summary.message_range_summarized.get("to", 0)
-    messages_to_summarize = messages[last_summarized_index:]
-    
-    if not messages_to_summarize:
-        return state
-    
-    # Convert messages to text for the prompt
-    conversation_text = "\n".join([
-        f"{'user' if isinstance(msg, dict) and msg.get('role') == 'user' else getattr(msg, 'type', 'unknown')}: {get_message_content(msg)}"
-        for msg in messages_to_summarize
-    ])
-    
-    # Summarization system prompt - Memory Management Agent role definition
-    system_prompt = """### Role
+SUMMARIZE_SYSTEM_PROMPT = SystemMessage(content="""### Role
 You are a Memory Management Agent. Your task is to update a structured session summary by analyzing conversation history.
 
 ### Context
@@ -263,95 +136,363 @@ The current state contains a list of messages. You will receive a batch of messa
 ### Critical Rules
 - DO NOT wrap the response in extra fields like "example_name"
 - Return ONLY the SessionSummary object, nothing else
-- All user_profile values MUST be strings (e.g., "budget": "$3000", not "budget": 3000)"""
+- All user_profile values MUST be strings (e.g., "budget": "$3000", not "budget": 3000)""")
+
+ANSWER_SYSTEM_PROMPT = SystemMessage(content="""You are a helpful AI assistant with access to conversation history and session memory.
 
-    user_prompt = f"""Current Summary (to be updated):
-{current_summary.model_dump_json(indent=2)}
+Use the provided context to give accurate, relevant responses. If the memory contains relevant information, incorporate it naturally into your response.
+
+Be conversational, friendly, and helpful.
+
+IMPORTANT GUIDELINES:
+- Be PROACTIVE and ACTION-ORIENTED: Provide helpful information, suggestions, and next steps
+- If the user's request is general, provide comprehensive general information first
+- Offer checklists, frameworks, and structured guidance when appropriate
+- If you need more details for specifics, provide general value FIRST, then ask natural follow-up questions
+- Frame follow-up questions conversationally, not as an interrogation
+- Default to being helpful rather than waiting for perfect information
+
+SPECIAL CASE - If the user's query is still unclear after previous clarification attempts:
+- Acknowledge the ambiguity politely
+- Provide the MOST HELPFUL general answer you can based on available context
+- Suggest specific ways the user can rephrase for better assistance""")
+
+# User prompt scaffolds; only the named slots change between calls
+ANALYZE_USER_TEMPLATE = """Recent conversation:
+{context}
+
+Latest query: {query}
+
+Analyze this query for ambiguity and determine what context is needed."""
+
+SUMMARIZE_USER_TEMPLATE = """Current Summary (to be updated):
+{summary}
 
 Messages to Archive (new conversation to merge):
-{conversation_text}
+{conversation}
 
 Update the summary by merging information from the messages to archive into the current summary."""
 
+
+@lru_cache(maxsize=1)
+def get_groq_client() -> ChatGroq:
+    """
+    Initialize and return a Groq chat client.
+    
+    The client (and its HTTP connection pool) is built once per process and
+    shared by every node; ChatGroq is safe to use from multiple threads.
+    A missing API key raises and is not cached, so it is re-checked next call.
+    """
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable not set")
+    return ChatGroq(model=GROQ_MODEL, temperature=0.7, api_key=api_key)
+
+
+@lru_cache(maxsize=4)
+def get_structured_llm(schema: type) -> Any:
+    """
+    Return the Groq client bound to structured output for a Pydantic schema.
+    
+    with_structured_output generates the JSON schema from the Pydantic model,
+    so the bound runnable is built once per schema and reused across calls.
+    
+    Args:
+        schema: Pydantic model class the response is parsed into
+        
+    Returns:
+        Runnable that returns an instance of schema
+    """
+    return get_groq_client().with_structured_output(schema)
+
+
+# Retry structured-output calls (invalid JSON, transient API errors) with exponential backoff
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.5, min=0.5, max=4),
+    reraise=True
+)
+async def ainvoke_structured(structured_llm, messages: list) -> Any:
+    """
+    Invoke a structured-output LLM asynchronously, retrying failed attempts.
+    
+    tenacity waits between attempts with asyncio.sleep, so retries don't
+    block the event loop.
+    
+    Args:
+        structured_llm: Runnable returned by with_structured_output()
+        messages: Prompt messages
+        
+    Returns:
+        Parsed Pydantic response; the last error is re-raised after 3 attempts
+    """
+    return await structured_llm.ainvoke(messages)
+
+
+def is_clearly_unambiguous(query: str) -> bool:
+    """
+    Cheap heuristic for prompts that don't need LLM ambiguity analysis.
+    
+    A question of at least three words with no back-referencing pronouns
+    or deictics ("it", "that", "those", ...) is treated as self-contained.
+    
+    Args:
+        query: The user's latest message
+        
+    Returns:
+        True if the query can skip analyze_query_node
+    """
+    return (
+        "?" in query
+        and len(query.split()) >= 3
+        and not _AMBIG_MARKERS.search(query)
+    )
+
+
+def precheck_node(state: GraphState) -> Command[Literal["answer", "analyze_query"]]:
+    """
+    Route obviously clear queries straight to answer_node.
+    
+    When the heuristic decides the query is clear, this node fills in the
+    QueryAnalysis itself (requesting every non-empty memory field, since no
+    LLM picked the relevant ones) and skips the analysis LLM call.
+    Everything else goes through analyze_query_node as before.
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        Command routing to answer (with analysis set) or analyze_query
+    """
+    messages = state["messages"]
+    if not messages:
+        return Command(goto="analyze_query")
+    
+    latest_message = messages[-1].content
+    if not is_clearly_unambiguous(latest_message):
+        return Command(goto="analyze_query")
+    
+    summary = state["summary"]
+    analysis = QueryAnalysis(
+        original_query=latest_message,
+        is_ambiguous=False,
+        needed_context_from_memory=[f for f in MEMORY_FIELDS if getattr(summary, f)]
+    )
+    return Command(update={"analysis": analysis}, goto="answer")
+
+
+async def analyze_query_node(state: GraphState) -> GraphState:
+    """
+    Analyze user query for ambiguity and determine needed context.
+    
+    This node uses Groq's structured output to detect if the user's intent
+    is unclear and identify what information from session memory is needed.
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        Updated state with QueryAnalysis results
+    """
+    messages = state["messages"]
+    summary = state["summary"]
+    
+    if not messages:
+        # No messages to analyze
+        state["analysis"] = QueryAnalysis(
+            is_ambiguous=False,
+            needed_context_from_memory=[]
+        )
+        return state
+    
+    # Get the latest user message
+    latest_message = messages[-1].content
+    
+    # Get recent conversation context (last 5 messages)
+    recent_context = messages[-RECENT_CONTEXT_SIZE:]
+    context_lines = list(map(format_message, recent_context))
+    context_text = "\n".join(context_lines)
+    
+    # answer_node runs next on the same messages and reuses these lines
+    state["context_cache"] = {
+        "last_message_id": messages[-1].id,
+        "tail_lines": context_lines
+    }
+    
+    system_prompt = ANALYZE_SYSTEM_PROMPT.content
+    user_prompt = ANALYZE_USER_TEMPLATE.format(context=context_text, query=latest_message)
+    
     try:
-        llm = get_groq_client()
-        structured_llm = llm.with_structured_output(SessionSummary)
+        response = RESPONSE_CACHE.get("analyze_query", system_prompt, user_prompt)
+        if response is None:
+            structured_llm = get_structured_llm(QueryAnalysis)
+            response = await ainvoke_structured(structured_llm, [
+                ANALYZE_SYSTEM_PROMPT,
+                HumanMessage(content=user_prompt)
+            ])
+            RESPONSE_CACHE.put("analyze_query", system_prompt, user_prompt, response)
+        
+        # Populate original_query from user input
+        response.original_query = latest_message
         
-        # Retry logic for structured output - increased to 3 for maximum reliability
-        max_retries = 3
-        last_error = None
+        # Step 1-2: Build augmented context if needed
+        if response.needed_context_from_memory:
+            memory_context = format_summary_for_prompt(
+                summary, 
+                response.needed_context_from_memory
+            )
+            response.final_augmented_context = "".join([
+                memory_context,
+                "\n\nRecent conversation:\n",
+                context_text
+            ])
         
-        for attempt in range(max_retries):
-            try:
-                response = structured_llm.invoke([
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=user_prompt)
-                ])
-                
-                # Update message range
-                response.message_range_summarized = {
-                    "from": 0,
-                    "to": len(messages)
-                }
-                
-                state["summary"] = response
-                
-                # JSON Logging for observability
-                print("\n" + "="*50)
-                print("SESSION SUMMARY (Auto-Summarization Triggered)")
-                print("="*50)
-                print(response.model_dump_json(indent=2))
-                print("="*50 + "\n")
-                
-                # Keep only last 5 messages for context
-                state["messages"] = messages[-5:]
-                
-                # Recalculate token count
-                state["current_token_count"] = count_tokens(messages_to_text(state["messages"]))
-                
-                return state
-                
-            except Exception as e:
-                last_error = e
-                if attempt < max_retries - 1:
-                    # Wait before retry (exponential backoff)
-                    import time
-                    time.sleep(0.5 * (attempt + 1))
-                    continue
-                else:
-                    # Final attempt failed, raise error
-                    raise last_error
+        # JSON logging for observability; only serialized when DEBUG is on
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("QUERY ANALYSIS (Step 1-3)\n%s", fast_json(response.model_dump()))
+        
+        state["analysis"] = response
+        return state
         
     except Exception as e:
-        print(f"Error in summarize_node: {e}")
-        # Keep existing summary on error
-        pass
+        log.error("Error in analyze_query_node: %s", e)
+        # Fallback: assume query is clear
+        state["analysis"] = QueryAnalysis(
+            original_query=latest_message,
+            is_ambiguous=False,
+            needed_context_from_memory=[]
+        )
     
     return state
 
 
-def answer_node(state: GraphState) -> GraphState:
+async def summarize_node(state: GraphState) -> GraphState:
+    """
+    Summarize conversation when token threshold is exceeded.
+    
+    This node merges new conversation information into the existing
+    SessionSummary and marks every message as archived, which resets the
+    token count that drives the threshold.
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        Updated state with new summary and reset token count
+    """
+    messages = state["messages"]
+    current_summary = state["summary"]
+    
+    # Determine which messages need summarization
+    last_summarized_index = current_summary.message_range_summarized.get("to", 0)
+    messages_to_summarize = messages[last_summarized_index:]
+    
+    if not messages_to_summarize:
+        return state
+    
+    # Convert messages to text for the prompt
+    conversation_text = "\n".join(map(format_message, messages_to_summarize))
+    
+    system_prompt = SUMMARIZE_SYSTEM_PROMPT.content
+    user_prompt = SUMMARIZE_USER_TEMPLATE.format(
+        summary=summary_to_compact_text(current_summary),
+        conversation=conversation_text
+    )
+    
+    try:
+        response = RESPONSE_CACHE.get("summarize", system_prompt, user_prompt)
+        if response is None:
+            structured_llm = get_structured_llm(SessionSummary)
+            response = await ainvoke_structured(structured_llm, [
+                SUMMARIZE_SYSTEM_PROMPT,
+                HumanMessage(content=user_prompt)
+            ])
+            RESPONSE_CACHE.put("summarize", system_prompt, user_prompt, response)
+        
+        # Update message range
+        response.message_range_summarized = {
+            "from": 0,
+            "to": len(messages)
+        }
+        
+        state["summary"] = response
+        
+        # JSON logging for observability; only serialized when DEBUG is on
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("SESSION SUMMARY (Auto-Summarization Triggered)\n%s", fast_json(response.model_dump()))
+        
+        # add_messages keeps the full log, but every message is now in the
+        # summary; only messages after message_range_summarized["to"] count
+        # toward the threshold (see answer_node)
+        state["current_token_count"] = 0
+        state["summary_pending"] = False
+        
+        return state
+        
+    except Exception as e:
+        log.error("Error in summarize_node: %s", e)
+        # Keep existing summary on error; the next turn retries alongside analysis
+        state["summary_pending"] = True
+    
+    return state
+
+
+async def analyze_and_maybe_summarize(state: GraphState) -> GraphState:
+    """
+    Run query analysis, catching up on summarization concurrently if needed.
+    
+    Summarization normally runs after answer_node. If the previous
+    summarization failed (summary_pending is set), it is retried here; both
+    LLM calls are independent, so they are awaited together and the turn
+    waits for the slower one rather than for both in sequence.
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        Updated state with QueryAnalysis results (and a new summary if one ran)
+    """
+    if not state.get("summary_pending"):
+        return await analyze_query_node(state)
+    
+    # Each node mutates its own shallow copy, then the results are merged
+    analyzed, summarized = await asyncio.gather(
+        analyze_query_node(dict(state)),
+        summarize_node(dict(state))
+    )
+    return {
+        **summarized,
+        "analysis": analyzed["analysis"],
+        "context_cache": analyzed.get("context_cache")
+    }
+
+
+async def answer_node(
+    state: GraphState,
+    config: RunnableConfig
+) -> Command[Literal["summarize", "__end__"]]:
     """
     Generate response using relevant context from memory.
     
     This node constructs a prompt with recent messages and specific
-    memory fields, then generates a contextual response.
+    memory fields, then generates a contextual response. The token
+    threshold check is done here as well, so the node routes straight
+    to summarize_node (or END) without a separate conditional edge.
     
     Args:
         state: Current graph state
+        config: Run config from LangGraph, passed on to the LLM call so its
+            streaming callbacks are attached on Python < 3.11 as well
         
     Returns:
-        Updated state with assistant's response added to messages
+        Command with the assistant's response and the next node to run
     """
     messages = state["messages"]
     summary = state["summary"]
     analysis = state["analysis"]
     
     if not messages:
-        return state
-    
-    # Get recent conversation (last 10 messages)
-    recent_messages = messages[-10:] if len(messages) > 10 else messages
+        return Command(goto=END)
     
     # Format relevant memory context
     memory_context = format_summary_for_prompt(
@@ -359,34 +500,20 @@ def answer_node(state: GraphState) -> GraphState:
         analysis.needed_context_from_memory or []
     )
     
-    # Build conversation history for prompt
-    conversation_history = "\n".join([
-        f"{'user' if isinstance(msg, dict) and msg.get('role') == 'user' else getattr(msg, 'type', 'unknown')}: {get_message_content(msg)}"
-        for msg in recent_messages[:-1]  # Exclude the latest message
-    ])
+    # Build conversation history from the last 10 messages, excluding the
+    # latest one. If analyze_query_node already formatted the last 5 for this
+    # same message list, only the older half needs formatting here.
+    context_cache = state.get("context_cache")
+    if context_cache and context_cache["last_message_id"] == messages[-1].id:
+        history_lines = list(map(format_message, messages[-HISTORY_WINDOW_SIZE:-RECENT_CONTEXT_SIZE]))
+        history_lines.extend(context_cache["tail_lines"][:-1])
+    else:
+        history_lines = list(map(format_message, messages[-HISTORY_WINDOW_SIZE:-1]))
+    conversation_history = "\n".join(history_lines)
     
-    latest_query = get_message_content(messages[-1])
+    latest_query = messages[-1].content
+    system_prompt = ANSWER_SYSTEM_PROMPT.content
     
-    # System prompt
-    system_prompt = """You are a helpful AI assistant with access to conversation history and session memory.
-
-Use the provided context to give accurate, relevant responses. If the memory contains relevant information, incorporate it naturally into your response.
-
-Be conversational, friendly, and helpful.
-
-IMPORTANT GUIDELINES:
-- Be PROACTIVE and ACTION-ORIENTED: Provide helpful information, suggestions, and next steps
-- If the user's request is general, provide comprehensive general information first
-- Offer checklists, frameworks, and structured guidance when appropriate
-- If you need more details for specifics, provide general value FIRST, then ask natural follow-up questions
-- Frame follow-up questions conversationally, not as an interrogation
-- Default to being helpful rather than waiting for perfect information
-
-SPECIAL CASE - If the user's query is still unclear after previous clarification attempts:
-- Acknowledge the ambiguity politely
-- Provide the MOST HELPFUL general answer you can based on available context
-- Suggest specific ways the user can rephrase for better assistance"""
-
     # User prompt with context
     user_prompt_parts = []
     
@@ -395,45 +522,73 @@ SPECIAL CASE - If the user's query is still unclear after previous clarification
         user_prompt_parts.append("\n---\n")
     
     if conversation_history:
-        user_prompt_parts.append(f"Recent conversation:\n{conversation_history}\n\n")
+        user_prompt_parts.extend(["Recent conversation:\n", conversation_history, "\n\n"])
     
-    user_prompt_parts.append(f"User: {latest_query}")
+    user_prompt_parts.extend(["User: ", latest_query])
     
     user_prompt = "".join(user_prompt_parts)
     
     try:
-        llm = get_groq_client()
-        
-        response = llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ])
+        # Identical (or trivially different) prompts reuse the previous answer
+        answer = RESPONSE_CACHE.get("answer", system_prompt, user_prompt)
+        if answer is None:
+            llm = get_groq_client()
+            
+            # Stream the reply; under stream_mode="messages" LangGraph forwards
+            # each chunk to the UI as it arrives. The config is passed
+            # explicitly because async nodes don't inherit it from context
+            # before Python 3.11. Tokens are tallied per chunk so the
+            # finished reply never has to be re-encoded.
+            answer_parts = []
+            answer_tokens = 0
+            async for chunk in llm.astream([
+                ANSWER_SYSTEM_PROMPT,
+                HumanMessage(content=user_prompt)
+            ], config):
+                if chunk.content:
+                    answer_parts.append(chunk.content)
+                    answer_tokens += count_tokens(chunk.content)
+            answer = "".join(answer_parts)
+            RESPONSE_CACHE.put("answer", system_prompt, user_prompt, answer)
+        else:
+            answer_tokens = count_tokens(answer)
         
         # With add_messages reducer, return new message instead of append
-        new_message = {"role": "assistant", "content": response.content}
+        new_message = {"role": "assistant", "content": answer}
         
-        # Update state and return - add_messages will merge the new message
-        state["current_token_count"] = count_tokens(messages_to_text(state["messages"]) + f"\nassistant: {response.content}")
-        state["clarification_count"] = 0  # Reset on successful answer
+        # Messages already archived in the summary don't count toward the threshold
+        summarized_to = summary.message_range_summarized.get("to", 0)
+        current_token_count = (
+            count_messages_tokens(messages[summarized_to:])
+            + MESSAGE_OVERHEAD_TOKENS
+            + answer_tokens
+        )
         
-        return {
-            **state,
-            "messages": [new_message]
-        }
+        # Summarize if the token threshold is exceeded, otherwise finish the turn
+        next_node = "summarize" if current_token_count > TOKEN_THRESHOLD else END
+        
+        # Partial update - LangGraph keeps the other channels as they are and
+        # add_messages appends the new message
+        return Command(
+            update={
+                "messages": [new_message],
+                "current_token_count": current_token_count,
+                "clarification_count": 0  # Reset on successful answer
+            },
+            goto=next_node
+        )
         
     except Exception as e:
-        print(f"Error in answer_node: {e}")
+        log.error("Error in answer_node: %s", e)
         # Return error message
         error_msg = {"role": "assistant", "content": f"I apologize, but I encountered an error: {str(e)}"}
-        return {
-            **state,
-            "messages": [error_msg]
-        }
-    
-    return state
+        return Command(
+            update={"messages": [error_msg]},
+            goto=END
+        )
 
 
-def clarify_node(state: GraphState) -> GraphState:
+def clarify_node(state: GraphState) -> dict:
     """
     Request clarification from the user for ambiguous queries.
     
@@ -443,14 +598,11 @@ def clarify_node(state: GraphState) -> GraphState:
         state: Current graph state
         
     Returns:
-        Updated state with clarification request
+        Partial state update with the clarification request
     """
     analysis = state["analysis"]
     clarification_count = state.get("clarification_count", 0)
     
-    # Increment clarification counter to prevent loops
-    state["clarification_count"] = clarification_count + 1
-    
     if not analysis.clarifying_questions or len(analysis.clarifying_questions) == 0:
         # Fallback clarification
         clarification = "I'm not sure I understand. Could you please provide more details?"
@@ -459,16 +611,15 @@ def clarify_node(state: GraphState) -> GraphState:
         if len(analysis.clarifying_questions) == 1:
             clarification = analysis.clarifying_questions[0]
         else:
-            clarification = "I need some clarification:\n\n" + "\n".join([
-                f"- {q}" 
-                for q in analysis.clarifying_questions
+            clarification = "\n".join([
+                "I need some clarification:\n",
+                *(f"- {q}" for q in analysis.clarifying_questions)
             ])
     
     # With add_messages reducer, return new message
     new_message = {"role": "assistant", "content": clarification}
-    state["clarification_count"] = state.get("clarification_count", 0) + 1
     
     return {
-        **state,
-        "messages": [new_message]
+        "messages": [new_message],
+        "clarification_count": clarification_count + 1  # Prevents clarify loops
     }
@@ -9,6 +9,7 @@ This module defines all Pydantic v2 models for type-safe data handling:
 
 from typing import Annotated, Optional, TypedDict
 from pydantic import BaseModel, Field, field_validator, model_validator
+from langchain_core.messages import AnyMessage
 from langgraph.graph.message import add_messages
 
 
@@ -140,11 +141,15 @@ class GraphState(TypedDict):
     All nodes receive and return this state structure.
     
     The messages field uses LangGraph's add_messages reducer for intelligent
-    message merging and deduplication.
+    message merging and deduplication. Nodes may return message dicts, but
+    the reducer normalizes them, so nodes always read LangChain message
+    objects and can use .type/.content directly.
     """
-    messages: Annotated[list[dict], add_messages]  # List of {"role": "user/assistant", "content": "..."}
+    messages: Annotated[list[AnyMessage], add_messages]
     summary: SessionSummary
     analysis: QueryAnalysis
     current_token_count: int
     clarification_count: int  # Track consecutive clarification attempts to prevent loops
+    summary_pending: bool  # Set when summarization failed and should be retried next turn
+    context_cache: Optional[dict]  # Formatted recent-message lines shared by analyze and answer
 
@@ -7,14 +7,24 @@ This module provides utility functions for:
 - Test data loading from JSONL files
 """
 
-import json
+import os
+import orjson
 import tiktoken
+from functools import lru_cache, singledispatch
 from typing import Any
+from langchain_core.messages import BaseMessage
 from schemas import SessionSummary
 
 
-# Initialize tiktoken encoder (cl100k_base is used by GPT-4 and similar models)
-ENCODER = tiktoken.get_encoding("cl100k_base")
+@lru_cache(maxsize=1)
+def get_encoder() -> tiktoken.Encoding:
+    """
+    Return the tiktoken encoder, loading it on first use.
+    
+    cl100k_base is used by GPT-4 and similar models. Loading is deferred so
+    importing this module stays cheap.
+    """
+    return tiktoken.get_encoding("cl100k_base")
 
 
 def count_tokens(text: str) -> int:
@@ -33,7 +43,122 @@ def count_tokens(text: str) -> int:
     """
     if not text:
         return 0
-    return len(ENCODER.encode(text))
+    return len(get_encoder().encode(text))
+
+
+def get_message_content(message) -> str:
+    """
+    Extract content from a message, whether it's a dict or LangChain object.
+    
+    Args:
+        message: Dict with 'content' key or LangChain message object
+        
+    Returns:
+        Message content as string
+    """
+    if isinstance(message, dict):
+        return message.get("content", "")
+    else:
+        # LangChain message object
+        return getattr(message, "content", "")
+
+
+@singledispatch
+def format_message(message) -> str:
+    """
+    Format a message as a "role: content" line for LLM prompts.
+    
+    Dispatches on the message type so each call does a single type lookup
+    instead of chained isinstance/getattr checks.
+    
+    Args:
+        message: Dict with 'role'/'content' keys or LangChain message object
+        
+    Returns:
+        Formatted line, e.g. "human: Hello"
+    """
+    return f"unknown: {message}"
+
+
+@format_message.register
+def _(message: dict) -> str:
+    return f"{message.get('role', 'unknown')}: {message.get('content', '')}"
+
+
+@format_message.register
+def _(message: BaseMessage) -> str:
+    return f"{message.type}: {message.content}"
+
+
+# Approximate tokens for the "role: " prefix and newline around each message
+MESSAGE_OVERHEAD_TOKENS = 3
+
+# Token counts keyed by message content; str caches its own hash, so lookups
+# for messages already in the history are O(1) rather than a re-encode
+_MESSAGE_TOKEN_CACHE: dict[str, int] = {}
+_MESSAGE_TOKEN_CACHE_SIZE = 10_000
+
+# encode_batch starts a new thread pool per call, so it only pays off when
+# many messages are uncached at once (e.g. loading a long test case)
+_BATCH_ENCODE_MIN = 16
+
+
+def count_messages_tokens(messages: list) -> int:
+    """
+    Count the tokens in a message history incrementally.
+    
+    Equivalent (up to the per-message prefix estimate) to
+    count_tokens(messages_to_text(messages)), but only messages not seen
+    before are encoded. Large sets of new messages are encoded in parallel
+    with encode_batch.
+    
+    Args:
+        messages: List of message dicts or LangChain message objects
+        
+    Returns:
+        Total token count of the history
+    """
+    cache = _MESSAGE_TOKEN_CACHE  # Local name for the per-message loops below
+    contents = list(map(get_message_content, messages))
+    unique = dict.fromkeys(contents)
+    
+    # Make room before encoding so every content of this call stays cached
+    if len(cache) + len(unique) > _MESSAGE_TOKEN_CACHE_SIZE:
+        cache.clear()
+    
+    missing = [c for c in unique if c not in cache]
+    if len(missing) >= _BATCH_ENCODE_MIN:
+        encoded = get_encoder().encode_batch(missing, num_threads=os.cpu_count() or 4)
+        for content, tokens in zip(missing, encoded):
+            cache[content] = len(tokens)
+    else:
+        for content in missing:
+            cache[content] = count_tokens(content)
+    
+    return sum(map(cache.__getitem__, contents)) + MESSAGE_OVERHEAD_TOKENS * len(contents)
+
+
+def _format_dict_field(title: str, value: dict) -> str:
+    """Format a dict summary field as an indented "key: value" list."""
+    return f"\n{title}:\n" + "\n".join(f"  - {k}: {v}" for k, v in value.items())
+
+
+def _format_list_field(title: str, value: list) -> str:
+    """Format a list summary field as an indented bullet list."""
+    return f"\n{title}:\n" + "\n".join(f"  - {item}" for item in value)
+
+
+# SessionSummary has a fixed schema, so each memory field maps to its formatter
+_FIELD_FORMATTERS = {
+    "user_profile": _format_dict_field,
+    "key_facts": _format_list_field,
+    "decisions": _format_list_field,
+    "open_questions": _format_list_field,
+    "todos": _format_list_field,
+}
+
+# Display names, e.g. 'user_profile' -> 'User Profile'
+_FIELD_TITLES = {field: field.replace("_", " ").title() for field in _FIELD_FORMATTERS}
 
 
 def format_summary_for_prompt(summary: SessionSummary, fields: list[str]) -> str:
@@ -58,31 +183,63 @@ def format_summary_for_prompt(summary: SessionSummary, fields: list[str]) -> str
     if not fields:
         return ""
     
+    # One dump of just the requested fields instead of per-field reflection
+    dumped = summary.model_dump(include=set(fields) & _FIELD_FORMATTERS.keys())
+    
     sections = ["=== SESSION MEMORY ==="]
+    sections.extend(
+        _FIELD_FORMATTERS[field](_FIELD_TITLES[field], dumped[field])
+        for field in fields
+        if dumped.get(field)  # Skip unknown and empty fields
+    )
     
-    for field in fields:
-        if not hasattr(summary, field):
-            continue
-            
-        value = getattr(summary, field)
-        
-        # Format field name nicely (e.g., 'user_profile' -> 'User Profile')
-        field_name = field.replace("_", " ").title()
-        
-        if isinstance(value, dict):
-            if value:  # Only include non-empty dicts
-                sections.append(f"\n{field_name}:")
-                for k, v in value.items():
-                    sections.append(f"  - {k}: {v}")
-        elif isinstance(value, list):
-            if value:  # Only include non-empty lists
-                sections.append(f"\n{field_name}:")
-                for item in value:
-                    sections.append(f"  - {item}")
+    return "\n".join(sections) if len(sections) > 1 else ""
+
+
+def fast_json(obj: Any) -> str:
+    """
+    Serialize plain Python data (e.g. a model_dump() dict) to JSON with orjson.
+    
+    Args:
+        obj: JSON-compatible object
+        
+    Returns:
+        JSON string with 2-space indentation
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+def summary_to_compact_text(summary: SessionSummary) -> str:
+    """
+    Render a SessionSummary as compact "field: value" text for LLM input.
+    
+    Drops the quoting and indentation of pretty-printed JSON, which the model
+    only needs to read. message_range_summarized is omitted because
+    summarize_node overwrites it after every call.
+    
+    Args:
+        summary: SessionSummary to render
+        
+    Returns:
+        Plain-text rendering with one line per profile entry group and a
+        bullet per list item
+        
+    Example:
+        >>> summary_to_compact_text(SessionSummary(user_profile={"name": "John"}, todos=["Book flight"]))
+        'user_profile: name=John\\nkey_facts: (none)\\ndecisions: (none)\\nopen_questions: (none)\\ntodos:\\n- Book flight'
+    """
+    profile = "; ".join(f"{k}={v}" for k, v in summary.user_profile.items())
+    lines = [f"user_profile: {profile or '(none)'}"]
+    
+    for field in ("key_facts", "decisions", "open_questions", "todos"):
+        items = getattr(summary, field)
+        if items:
+            lines.append(f"{field}:")
+            lines.extend(f"- {item}" for item in items)
         else:
-            sections.append(f"\n{field_name}: {value}")
+            lines.append(f"{field}: (none)")
     
-    return "\n".join(sections) if len(sections) > 1 else ""
+    return "\n".join(lines)
 
 
 def load_test_data(file_path: str) -> list[dict[str, Any]]:
@@ -100,27 +257,64 @@ def load_test_data(file_path: str) -> list[dict[str, Any]]:
         
     Raises:
         FileNotFoundError: If the file doesn't exist
-        json.JSONDecodeError: If the file contains invalid JSON
         
     Example:
         >>> test_cases = load_test_data("data/conversations.jsonl")
         >>> len(test_cases)
         3
     """
+    # One bulk read, then parse each line straight from bytes with orjson
+    with open(file_path, 'rb') as f:
+        lines = f.read().splitlines()
+    
     test_cases = []
+    for line_num, line in enumerate(lines, 1):
+        if not line.strip():  # Skip empty lines
+            continue
+        try:
+            test_cases.append(orjson.loads(line))
+        except orjson.JSONDecodeError as e:
+            print(f"Warning: Skipping invalid JSON on line {line_num}: {e}")
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:  # Skip empty lines
-                continue
-            try:
-                test_cases.append(json.loads(line))
-            except json.JSONDecodeError as e:
-                print(f"Warning: Skipping invalid JSON on line {line_num}: {e}")
+    return test_cases
+
+
+def load_test_case(file_path: str, index: int) -> dict[str, Any] | None:
+    """
+    Load a single test case from a JSONL file without parsing the others.
+    
+    The file is streamed line by line and only the requested line is
+    decoded. Blank lines are skipped, so for a well-formed file the result
+    matches load_test_data(file_path)[index].
+    
+    Args:
+        file_path: Path to the .jsonl file
+        index: Zero-based index of the test case to load
+        
+    Returns:
+        The test case dictionary, or None if the index is out of range
+        
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        orjson.JSONDecodeError: If the requested line contains invalid JSON
+        
+    Example:
+        >>> load_test_case("data/conversations.jsonl", 1)["name"]
+        'Ambiguous Query'
+    """
+    if index < 0:
+        return None
+    
+    case_num = 0
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if not line.strip():  # Skip empty lines
                 continue
+            if case_num == index:
+                return orjson.loads(line)
+            case_num += 1
     
-    return test_cases
+    return None
 
 
 def messages_to_text(messages: list) -> str:
@@ -135,21 +329,4 @@ def messages_to_text(messages: list) -> str:
     Returns:
         Concatenated text of all messages
     """
-    from langchain_core.messages import BaseMessage
-    
-    result = []
-    for msg in messages:
-        if isinstance(msg, dict):
-            role = msg.get('role', 'unknown')
-            content = msg.get('content', '')
-        elif isinstance(msg, BaseMessage):
-            # LangChain message object
-            role = msg.type if hasattr(msg, 'type') else 'unknown'
-            content = msg.content if hasattr(msg, 'content') else ''
-        else:
-            role = 'unknown'
-            content = str(msg)
-        
-        result.append(f"{role}: {content}")
-    
-    return "\n".join(result)
+    return "\n".join(map(format_message, messages))